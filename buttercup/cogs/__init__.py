@@ -1,23 +1,40 @@
 """The cogs which provide the functionality to the bot."""
 
-# Colors to use in the plots
-from matplotlib import pyplot as plt
+import matplotlib
 
+# Colors to use in the plots
 background_color = "#36393f"  # Discord background color
 text_color = "white"
 line_color = "white"
 
-# Global settings for all plots
-plt.rcParams["figure.facecolor"] = background_color
-plt.rcParams["axes.facecolor"] = background_color
-plt.rcParams["axes.labelcolor"] = text_color
-plt.rcParams["axes.edgecolor"] = line_color
-plt.rcParams["text.color"] = text_color
-plt.rcParams["xtick.color"] = line_color
-plt.rcParams["ytick.color"] = line_color
-plt.rcParams["grid.color"] = line_color
-plt.rcParams["grid.alpha"] = 0.8
-plt.rcParams["figure.dpi"] = 200.0
+# Global settings for all plots, see apply_plot_style
+plot_style = {
+    "figure.facecolor": background_color,
+    "axes.facecolor": background_color,
+    "axes.labelcolor": text_color,
+    "axes.edgecolor": line_color,
+    "text.color": text_color,
+    "xtick.color": line_color,
+    "ytick.color": line_color,
+    "grid.color": line_color,
+    "grid.alpha": 0.8,
+    "figure.dpi": 200.0,
+}
+plot_style_applied = False
+
+
+def apply_plot_style() -> None:
+    """Apply the global settings for all plots.
+
+    This has to be called before creating a figure.
+    The settings are only applied on the first call, so that the bot startup
+    doesn't have to wait for it.
+    """
+    global plot_style_applied
+    if not plot_style_applied:
+        matplotlib.rcParams.update(plot_style)
+        plot_style_applied = True
+
 
 # Official flair ranks
 # Maybe we'll have this in the API one day,
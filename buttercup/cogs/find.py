@@ -1,4 +1,4 @@
-from datetime import datetime
+import time
 from typing import Dict, Optional, Tuple
 
 from blossom_wrapper import BlossomAPI
@@ -157,7 +157,7 @@ class Find(Cog):
     )
     async def _find(self, ctx: SlashContext, reddit_url: str) -> None:
         """Find the post with the given URL."""
-        start = datetime.now()
+        start = time.perf_counter()
 
         # Send a first message to show that the bot is responsive.
         # We will edit this message later with the actual content.
@@ -1,20 +1,28 @@
+import asyncio
 import io
-from datetime import datetime
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 
-import matplotlib.pyplot as plt
-import pandas as pd
+import numpy as np
 import seaborn as sns
 from blossom_wrapper import BlossomAPI
 from discord import File
 from discord.ext.commands import Cog
 from discord_slash import SlashContext, cog_ext
 from discord_slash.utils.manage_commands import create_option
+from matplotlib.axes import Axes
+from matplotlib.figure import Figure
+from seaborn.utils import relative_luminance
 
 from buttercup.bot import ButtercupBot
+from buttercup.cogs import apply_plot_style
 from buttercup.cogs.helpers import (
     BlossomException,
     BlossomUser,
+    TimedCache,
     extract_utc_offset,
     get_duration_str,
     get_initial_username,
@@ -22,54 +30,97 @@ from buttercup.cogs.helpers import (
     get_user_id,
     get_username,
     parse_time_constraints,
+    run_in_executor,
     utc_offset_to_str,
 )
 from buttercup.strings import translation
 
 i18n = translation()
 
-
-def create_file_from_heatmap(
-    heatmap: pd.DataFrame, user: Optional[BlossomUser], utc_offset: int = 0
-) -> File:
-    """Create a Discord file containing the heatmap table."""
-    days = i18n["heatmap"]["days"]
-    hours = ["{:02d}".format(hour) for hour in range(0, 24)]
-
-    # The built in formatting for the heatmap doesn't allow displaying floats as ints
-    # And we have to use floats because empty entries are NaN
-    # So we have to manually provide the annotations
-    annotations = heatmap.apply(
-        lambda series: series.apply(lambda value: f"{value:0.0f}")
-    )
-
-    fig, ax = plt.subplots()
-    fig.set_size_inches(9, 3.44)
-
-    sns.heatmap(
-        heatmap,
-        ax=ax,
-        annot=annotations,
-        fmt="s",
-        cbar=False,
-        square=True,
-        xticklabels=hours,
-        yticklabels=days,
-    )
-
+# The labels of the heatmap axes
+heatmap_days = tuple(i18n["heatmap"]["days"])
+heatmap_hours = tuple(f"{hour:02d}" for hour in range(0, 24))
+
+# All heatmaps are drawn on the same figure, see get_heatmap_figure
+# The lock makes sure that only one heatmap is drawn on it at a time.
+heatmap_lock = threading.Lock()
+# Rendering blocks for a while, so it's done outside of the event loop
+# Only one heatmap can be drawn at a time anyway, so a single thread is enough
+heatmap_executor = ThreadPoolExecutor(max_workers=1)
+# The default color map of seaborn heatmaps
+heatmap_cmap = sns.color_palette("rocket", as_cmap=True)
+
+
+@lru_cache(maxsize=None)
+def get_heatmap_figure() -> Tuple[Figure, Axes, Dict[str, float]]:
+    """Get the figure to draw the heatmaps on, with its axes and initial margins.
+
+    The heatmap always has the same layout, so we reuse a single figure
+    instead of building (and tearing down) a new one for every command.
+    It is only created when the first heatmap is drawn.
+    """
+    apply_plot_style()
+    fig = Figure(figsize=(9, 3.44))
+    ax = fig.subplots()
+    # The tight layout has to start from the initial margins for every heatmap,
+    # otherwise it drifts
+    margins = {
+        margin: getattr(fig.subplotpars, margin)
+        for margin in ["left", "bottom", "right", "top"]
+    }
+    return fig, ax, margins
+
+
+def create_image_from_heatmap(
+    heatmap: np.ndarray, user: Optional[BlossomUser], utc_offset: int = 0
+) -> bytes:
+    """Create a PNG image of the heatmap table.
+
+    :param heatmap: The 7x24 table with the days as rows and the hours as columns.
+        Empty entries are NaN.
+    """
     timezone = utc_offset_to_str(utc_offset)
+    heatmap_table = io.BytesIO()
 
-    plt.title(i18n["heatmap"]["plot_title"].format(user=get_username(user)))
-    plt.xlabel(i18n["heatmap"]["plot_xlabel"].format(timezone=timezone))
-    plt.ylabel(i18n["heatmap"]["plot_ylabel"])
+    with heatmap_lock:
+        fig, ax, margins = get_heatmap_figure()
+        # Remove the previous heatmap from the figure
+        ax.clear()
 
-    fig.tight_layout()
-    heatmap_table = io.BytesIO()
-    plt.savefig(heatmap_table, format="png")
-    heatmap_table.seek(0)
-    plt.close(fig)
+        # Draw the cells directly as an image, empty entries (NaN) stay transparent
+        img = ax.imshow(
+            heatmap, cmap=heatmap_cmap, aspect="equal", interpolation="nearest"
+        )
+        ax.set_frame_on(False)
+        ax.set_xticks(range(len(heatmap_hours)))
+        ax.set_xticklabels(heatmap_hours)
+        ax.set_yticks(range(len(heatmap_days)))
+        ax.set_yticklabels(heatmap_days, rotation="vertical", va="center")
+
+        # Annotate every non-empty cell with its count
+        rows, cols = np.nonzero(~np.isnan(heatmap))
+        counts = heatmap[rows, cols]
+        labels = np.char.mod("%.0f", counts)
+        # Use dark text on light cells and light text on dark cells
+        luminances = np.atleast_1d(relative_luminance(img.to_rgba(counts)))
+        for row, col, label, luminance in zip(rows, cols, labels, luminances):
+            text_color = ".15" if luminance > 0.408 else "w"
+            ax.text(col, row, label, color=text_color, ha="center", va="center")
+
+        ax.set_title(i18n["heatmap"]["plot_title"].format(user=get_username(user)))
+        ax.set_xlabel(i18n["heatmap"]["plot_xlabel"].format(timezone=timezone))
+        ax.set_ylabel(i18n["heatmap"]["plot_ylabel"])
+
+        fig.subplots_adjust(**margins)
+        fig.tight_layout()
+        # The PNG encoding is a large part of the render time
+        # A low compression level is much faster for a slightly larger file
+        # The table stays readable with a lower resolution than the other plots
+        fig.savefig(
+            heatmap_table, format="png", dpi=150, pil_kwargs={"compress_level": 1}
+        )
 
-    return File(heatmap_table, "heatmap_table.png")
+    return heatmap_table.getvalue()
 
 
 class Heatmap(Cog):
@@ -77,6 +128,8 @@ class Heatmap(Cog):
         """Initialize the Heatmap cog."""
         self.bot = bot
         self.blossom_api = blossom_api
+        # Repeated requests for the same heatmap reuse the rendered image
+        self.cache = TimedCache(capacity=32, ttl=5 * 60)
 
     @cog_ext.cog_slash(
         name="heatmap",
@@ -110,7 +163,7 @@ class Heatmap(Cog):
         before: Optional[str] = None,
     ) -> None:
         """Generate a heatmap for the given user."""
-        start = datetime.now()
+        start = time.perf_counter()
 
         after_time, before_time, time_str = parse_time_constraints(after, before)
 
@@ -122,12 +175,41 @@ class Heatmap(Cog):
 
         utc_offset = extract_utc_offset(ctx.author.display_name)
 
-        from_str = after_time.isoformat() if after_time else None
-        until_str = before_time.isoformat() if before_time else None
+        user = await get_user(username, ctx, self.blossom_api)
 
-        user = get_user(username, ctx, self.blossom_api)
+        # Relative times (e.g. "1 week") depend on the current time,
+        # so the times given by the user are used for the cache key instead.
+        # The cached heatmap is at most as old as the TTL of the cache.
+        cache_key = (get_user_id(user), after, before, utc_offset)
+        heatmap_image = self.cache.get(cache_key)
+
+        if heatmap_image is None:
+            from_str = after_time.isoformat() if after_time else None
+            until_str = before_time.isoformat() if before_time else None
+            heatmap_image = await self._create_heatmap_image(
+                user, from_str, until_str, utc_offset
+            )
+            self.cache.set(cache_key, heatmap_image)
+
+        await msg.edit(
+            content=i18n["heatmap"]["response_message"].format(
+                user=get_username(user),
+                time_str=time_str,
+                duration=get_duration_str(start),
+            ),
+            file=File(io.BytesIO(heatmap_image), "heatmap_table.png"),
+        )
 
-        heatmap_response = self.blossom_api.get(
+    async def _create_heatmap_image(
+        self,
+        user: Optional[BlossomUser],
+        from_str: Optional[str],
+        until_str: Optional[str],
+        utc_offset: int,
+    ) -> bytes:
+        """Fetch the heatmap data of the given user and render it."""
+        heatmap_response = await run_in_executor(
+            self.blossom_api.get,
             "submission/heatmap/",
             params={
                 "completed_by": get_user_id(user),
@@ -141,27 +223,15 @@ class Heatmap(Cog):
 
         data = heatmap_response.json()
 
-        day_index = pd.Index(range(1, 8))
-        hour_index = pd.Index(range(0, 24))
-
-        heatmap = (
-            # Create a data frame from the data
-            pd.DataFrame.from_records(data, columns=["day", "hour", "count"])
-            # Convert it into a table with the days as rows and hours as columns
-            .pivot(index="day", columns="hour", values="count")
-            # Add the missing days and hours
-            .reindex(index=day_index, columns=hour_index)
-        )
+        # Create a table with the days as rows and the hours as columns
+        # The days start at 1, missing entries are NaN
+        heatmap = np.full((7, 24), np.nan)
+        for entry in data:
+            heatmap[entry["day"] - 1, entry["hour"]] = entry["count"]
 
-        heatmap_table = create_file_from_heatmap(heatmap, user, utc_offset)
-
-        await msg.edit(
-            content=i18n["heatmap"]["response_message"].format(
-                user=get_username(user),
-                time_str=time_str,
-                duration=get_duration_str(start),
-            ),
-            file=heatmap_table,
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            heatmap_executor, create_image_from_heatmap, heatmap, user, utc_offset
         )
 
 
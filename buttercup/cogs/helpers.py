@@ -1,9 +1,23 @@
+import asyncio
 import math
 import re
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple, TypedDict, Union
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache, partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Tuple,
+    TypedDict,
+    Union,
+)
 
-import pytz
 from blossom_wrapper import BlossomAPI, BlossomResponse, BlossomStatus
 from dateutil import parser
 from discord import DiscordException, User
@@ -23,17 +37,30 @@ timezone_regex = re.compile(
 relative_time_regex = re.compile(
     r"^(?P<amount>\d+(?:\.\d+)?)\s*(?P<unit>\w*)\s*(?:ago\s*)?$"
 )
-# The different time units
-unit_regexes: Dict[str, re.Pattern] = {
-    "seconds": re.compile(r"^s(?:ec(?:ond)?s?)?$"),
-    "minutes": re.compile(r"^min(?:ute)?s?$"),
+# The different time units, the name of the matching group is the unit
+# This has to be used with fullmatch, so that every alternative is tried
+unit_regex = re.compile(
+    r"(?P<seconds>s(?:ec(?:ond)?s?)?)"
+    r"|(?P<minutes>min(?:ute)?s?)"
     # Hour is the default, so the whole thing is optional
-    "hours": re.compile(r"^(?:h(?:ours?)?)?$"),
-    "days": re.compile(r"^d(?:ays?)?$"),
-    "weeks": re.compile(r"^w(?:eeks?)?$"),
-    "months": re.compile(r"^m(?:onths?)?$"),
-    "years": re.compile(r"^y(?:ears?)?$"),
-}
+    r"|(?P<hours>(?:h(?:ours?)?)?)"
+    r"|(?P<days>d(?:ays?)?)"
+    r"|(?P<weeks>w(?:eeks?)?)"
+    r"|(?P<months>m(?:onths?)?)"
+    r"|(?P<years>y(?:ears?)?)"
+)
+# The name of the subreddit in a Reddit URL
+subreddit_regex = re.compile(r"/r/(?P<subreddit>[^/]+)")
+
+# The rank thresholds in ascending order, used to look up ranks by gamma
+rank_thresholds = [rank["threshold"] for rank in ranks]
+# The rank of users who haven't reached the first threshold yet
+visitor_rank = {"name": "Visitor", "threshold": 0, "color": "#000000"}
+ranks_with_visitor = [visitor_rank, *ranks]
+# The index of the rank for every gamma up to the highest threshold
+rank_table = bytes(
+    bisect_right(rank_thresholds, gamma) for gamma in range(rank_thresholds[-1] + 1)
+)
 
 
 class BlossomUser(TypedDict):
@@ -101,12 +128,84 @@ class TimeParseError(RuntimeError):
         self.time_str = time_str
 
 
+class TimedCache:
+    def __init__(self, capacity: int, ttl: float) -> None:
+        """Initialize a new cache whose entries expire after a fixed time.
+
+        :param capacity: The maximum number of entries.
+            When it is exceeded, the least recently used entry is deleted.
+        :param ttl: The number of seconds after which an entry expires.
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self.cache = OrderedDict()
+
+    def set(self, key: Hashable, value: Any, created: Optional[float] = None) -> None:
+        """Set an entry of the cache.
+
+        :param key: The key of the entry.
+        :param value: The value to cache.
+        :param created: The monotonic time when the value was created.
+            This should only be set directly in tests, keep it as the default value.
+        """
+        if created is None:
+            created = time.monotonic()
+        self.cache[key] = (created, value)
+        self.cache.move_to_end(key)
+        # Make sure the capacity is not exceeded
+        if len(self.cache) > self.capacity:
+            self.cache.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get the cached value for the given key.
+
+        Returns None if the key is not cached or if the entry has expired.
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+
+        created, value = entry
+        if time.monotonic() - created > self.ttl:
+            del self.cache[key]
+            return None
+
+        self.cache.move_to_end(key)
+        return value
+
+
+def split_display_name(display_name: str) -> Optional[Tuple[str, str]]:
+    """Split the display name into the Reddit username and the rest.
+
+    This is a hand-written equivalent of the username_regex,
+    because it's used on pretty much every command.
+    Returns None if the display name doesn't start with a username.
+    """
+    if not display_name or display_name[0].isspace():
+        return None
+
+    # Skip the optional "/u/" or "u/" prefix,
+    # but only if a username follows it
+    start = 0
+    if display_name.startswith("/u/"):
+        start = 3
+    elif display_name.startswith("u/"):
+        start = 2
+    if start >= len(display_name) or display_name[start].isspace():
+        start = 0
+
+    # The username goes up to the first whitespace
+    username = display_name[start:].split(maxsplit=1)[0]
+    return username, display_name[start + len(username) :]
+
+
+@lru_cache(maxsize=1024)
 def extract_username(display_name: str) -> str:
     """Extract the Reddit username from the display name."""
-    match = username_regex.search(display_name)
-    if match is None:
+    split_name = split_display_name(display_name)
+    if split_name is None:
         raise NoUsernameException()
-    return match.group("username")
+    return split_name[0]
 
 
 def get_usernames_from_user_list(
@@ -174,7 +273,17 @@ def get_initial_username_list(usernames: str, ctx: SlashContext) -> str:
     return join_items_with_and(username_list)
 
 
-def get_user(
+async def run_in_executor(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking function in a separate thread and wait for the result.
+
+    This should be used for the synchronous Blossom API requests,
+    so that they don't block the event loop of the bot.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, partial(func, *args, **kwargs))
+
+
+async def get_user(
     username: str, ctx: SlashContext, blossom_api: BlossomAPI
 ) -> Optional[BlossomUser]:
     """Get the given user from Blossom.
@@ -193,7 +302,7 @@ def get_user(
     _username = ctx.author.display_name if username.casefold() == "me" else username
     _username = extract_username(_username)
 
-    user_response = blossom_api.get_user(_username)
+    user_response = await run_in_executor(blossom_api.get_user, _username)
 
     if user_response.status != BlossomStatus.ok:
         raise UserNotFoundException(_username)
@@ -208,12 +317,13 @@ def get_user(
     return user
 
 
-def get_user_list(
+async def get_user_list(
     usernames: str, ctx: SlashContext, blossom_api: BlossomAPI
 ) -> Optional[List[BlossomUser]]:
     """Get the given users from Blossom.
 
     The usernames should be separated with a space.
+    The users are requested concurrently.
 
     Special keywords:
     - "me": Returns the user executing the command (from the SlashContext).
@@ -222,7 +332,9 @@ def get_user_list(
     If the user could not be found, a UserNotFoundException is thrown.
     """
     username_input = usernames.split(" ")
-    user_list = [get_user(user, ctx, blossom_api) for user in username_input]
+    user_list = await asyncio.gather(
+        *[get_user(user, ctx, blossom_api) for user in username_input]
+    )
 
     if None in user_list:
         return None
@@ -293,16 +405,17 @@ def extract_sub_name(subreddit: str) -> str:
     return subreddit
 
 
+@lru_cache(maxsize=1024)
 def extract_utc_offset(display_name: str) -> int:
     """Extract the user's timezone (UTC offset) from the display name.
 
     :returns: The UTC offset in seconds.
     """
-    username_match = username_regex.match(display_name)
-    if username_match is None:
+    split_name = split_display_name(display_name)
+    if split_name is None:
         return 0
 
-    if rest := username_match.group("rest"):
+    if rest := split_name[1]:
         timezone_match = timezone_regex.search(rest)
         if timezone_match is None:
             return 0
@@ -319,20 +432,23 @@ def extract_utc_offset(display_name: str) -> int:
     return 0
 
 
+@lru_cache(maxsize=256)
 def utc_offset_to_str(utc_offset: int) -> str:
     """Convert a UTC offset to a readable string.
 
     :param utc_offset: The UTC offset in seconds.
     """
     sign = "-" if utc_offset < 0 else "+"
-    hours = abs(utc_offset) // (60 * 60)
-    minutes = (abs(utc_offset) % (60 * 60)) // 60
+    hours, minutes = divmod(abs(utc_offset) // 60, 60)
     return f"UTC{sign}{hours:02}:{minutes:02}"
 
 
-def get_duration_str(start: datetime) -> str:
-    """Get the processing duration based on the start time."""
-    duration = datetime.now(tz=start.tzinfo) - start
+def get_duration_str(start: float) -> str:
+    """Get the processing duration based on the start time.
+
+    :param start: The start time, as returned by time.perf_counter().
+    """
+    duration = timedelta(seconds=time.perf_counter() - start)
     return get_timedelta_str(duration)
 
 
@@ -388,7 +504,7 @@ def join_items_with_and(items: List[str]) -> str:
     """Join the list with commas and "and"."""
     if len(items) <= 2:
         return " and ".join(items)
-    return "{} and {}".format(", ".join(items[:-1]), items[-1])
+    return f"{', '.join(items[:-1])} and {items[-1]}"
 
 
 def get_discord_time_str(date_time: datetime, style: str = "f") -> str:
@@ -404,7 +520,7 @@ def get_discord_time_str(date_time: datetime, style: str = "f") -> str:
 
 def format_absolute_datetime(date_time: datetime) -> str:
     """Generate a human-readable absolute time string."""
-    now = datetime.now(tz=pytz.utc)
+    now = datetime.now(tz=timezone.utc)
     format_str = ""
     if date_time.date() != now.date():
         format_str += "%Y-%m-%d"
@@ -436,6 +552,17 @@ def format_relative_datetime(amount: float, unit_key: str) -> str:
     return f"{amount_str} {unit_str} ago"
 
 
+@lru_cache(maxsize=256)
+def get_unit_key(unit: str) -> Optional[str]:
+    """Determine the time unit from the given unit string.
+
+    For example, "mins" is converted to "minutes".
+    Returns None if the unit string is invalid.
+    """
+    match = unit_regex.fullmatch(unit)
+    return match.lastgroup if match is not None else None
+
+
 def try_parse_time(time_str: str) -> Tuple[datetime, str]:
     """Try to parse the given time string.
 
@@ -450,28 +577,34 @@ def try_parse_time(time_str: str) -> Tuple[datetime, str]:
         amount = float(rel_time_match.group("amount"))
         unit = rel_time_match.group("unit")
         # Determine which unit we are dealing with
-        for unit_key in unit_regexes:
-            match = unit_regexes[unit_key].match(unit)
-            if match is not None:
-                # Construct the time delta from the unit and amount
-                if unit_key == "months":
-                    delta = timedelta(days=30 * amount)
-                elif unit_key == "years":
-                    delta = timedelta(days=365 * amount)
-                else:
-                    delta = timedelta(**{unit_key: amount})
-
-                absolute_time = datetime.now(tz=pytz.utc) - delta
-                relative_time_str = format_relative_datetime(amount, unit_key)
-
-                return absolute_time, relative_time_str
+        unit_key = get_unit_key(unit)
+        if unit_key is not None:
+            # Construct the time delta from the unit and amount
+            if unit_key == "months":
+                delta = timedelta(days=30 * amount)
+            elif unit_key == "years":
+                delta = timedelta(days=365 * amount)
+            else:
+                delta = timedelta(**{unit_key: amount})
+
+            absolute_time = datetime.now(tz=timezone.utc) - delta
+            relative_time_str = format_relative_datetime(amount, unit_key)
+
+            return absolute_time, relative_time_str
 
     # Check for absolute time
     # For example "2021-09-03"
     try:
-        absolute_time = parser.parse(time_str)
+        try:
+            # ISO dates are the most common, they can be parsed a lot faster
+            absolute_time = datetime.fromisoformat(time_str)
+        except ValueError:
+            # Fall back to the slower, more lenient parser
+            absolute_time = parser.parse(time_str)
         # Make sure it has a timezone
-        absolute_time = absolute_time.replace(tzinfo=absolute_time.tzinfo or pytz.utc)
+        absolute_time = absolute_time.replace(
+            tzinfo=absolute_time.tzinfo or timezone.utc
+        )
         absolute_time_str = format_absolute_datetime(absolute_time)
         return absolute_time, absolute_time_str
     except ValueError:
@@ -499,11 +632,10 @@ def parse_time_constraints(
 
 def get_rank(gamma: int) -> Dict[str, Union[str, int]]:
     """Get the rank matching the gamma score."""
-    for rank in reversed(ranks):
-        if gamma >= rank["threshold"]:
-            return rank
-
-    return {"name": "Visitor", "threshold": 0, "color": "#000000"}
+    if 0 <= gamma < len(rank_table):
+        return ranks_with_visitor[rank_table[gamma]]
+    # Find the highest rank whose threshold has been reached
+    return ranks_with_visitor[bisect_right(rank_thresholds, gamma)]
 
 
 def get_rgb_from_hex(hex_str: str) -> Tuple[int, int, int]:
@@ -517,7 +649,8 @@ def get_rgb_from_hex(hex_str: str) -> Tuple[int, int, int]:
 def extract_sub_from_url(url: str) -> str:
     """Extract the subreddit from a Reddit URL."""
     # https://reddit.com/r/thatHappened/comments/qzhtyb/the_more_you_read_the_less_believable_it_gets/hlmkuau/
-    return "r/" + url.split("/")[4]
+    match = subreddit_regex.search(url)
+    return "r/" + match.group("subreddit") if match else "r/?"
 
 
 def get_transcription_source(transcription: Dict[str, Any]) -> str:
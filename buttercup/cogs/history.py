@@ -1,12 +1,12 @@
 import io
 import math
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Tuple, Union
 
 import discord
 import matplotlib.pyplot as plt
 import pandas as pd
-import pytz
 from blossom_wrapper import BlossomAPI
 from dateutil import parser
 from discord import Embed, File
@@ -16,7 +16,7 @@ from discord_slash.model import SlashMessage
 from discord_slash.utils.manage_commands import create_option
 
 from buttercup.bot import ButtercupBot
-from buttercup.cogs import ranks
+from buttercup.cogs import apply_plot_style, ranks
 from buttercup.cogs.helpers import (
     BlossomException,
     BlossomUser,
@@ -54,7 +54,7 @@ def get_data_granularity(
         return "week"
 
     # TODO: Adjust this when the Blossom dates have been fixed
-    now = datetime.now(tz=pytz.utc)
+    now = datetime.now(tz=timezone.utc)
     date_joined = parser.parse(user["date_joined"])
     total_delta = now - date_joined
     total_hours = total_delta.total_seconds() / 60
@@ -109,13 +109,13 @@ def add_zero_rates(
     """
     new_index = set()
     delta = get_timedelta_from_time_frame(time_frame)
-    now = datetime.now(tz=pytz.utc)
+    now = datetime.now(tz=timezone.utc)
 
     if after_time:
         # Add the earliest point according to the timeframe
         first_date = data.index[0]
         # Make sure everything is localized
-        first_date = first_date.replace(tzinfo=pytz.utc)
+        first_date = first_date.replace(tzinfo=timezone.utc)
 
         missing_delta: timedelta = first_date - after_time
         missing_time_frames = missing_delta.total_seconds() // delta.total_seconds()
@@ -136,7 +136,7 @@ def add_zero_rates(
     # Add the latest point according to the timeframe
     last_date = data.index[-1]
     # Make sure everything is localized
-    last_date = last_date.replace(tzinfo=pytz.utc)
+    last_date = last_date.replace(tzinfo=timezone.utc)
 
     missing_delta: timedelta = (before_time or now) - last_date
     missing_time_frames = missing_delta.total_seconds() // delta.total_seconds()
@@ -480,7 +480,7 @@ class History(Cog):
         before: Optional[str] = None,
     ) -> None:
         """Get the transcription history of the user."""
-        start = datetime.now()
+        start = time.perf_counter()
 
         after_time, before_time, time_str = parse_time_constraints(after, before)
 
@@ -494,7 +494,7 @@ class History(Cog):
             )
         )
 
-        users = get_user_list(usernames, ctx, self.blossom_api)
+        users = await get_user_list(usernames, ctx, self.blossom_api)
         if users:
             users.sort(key=lambda u: u["gamma"], reverse=True)
         colors = get_user_colors(users)
@@ -502,6 +502,7 @@ class History(Cog):
         min_gammas = []
         max_gammas = []
 
+        apply_plot_style()
         fig: plt.Figure = plt.figure()
         ax: plt.Axes = fig.gca()
 
@@ -613,7 +614,7 @@ class History(Cog):
         before: Optional[str] = None,
     ) -> None:
         """Get the transcription rate of the user."""
-        start = datetime.now()
+        start = time.perf_counter()
 
         after_time, before_time, time_str = parse_time_constraints(after, before)
 
@@ -627,13 +628,14 @@ class History(Cog):
             )
         )
 
-        users = get_user_list(usernames, ctx, self.blossom_api)
+        users = await get_user_list(usernames, ctx, self.blossom_api)
         if users:
             users.sort(key=lambda u: u["gamma"], reverse=True)
         colors = get_user_colors(users)
 
         max_rates = []
 
+        apply_plot_style()
         fig: plt.Figure = plt.figure()
         ax: plt.Axes = fig.gca()
 
@@ -717,7 +719,8 @@ class History(Cog):
         msg: SlashMessage,
         user: BlossomUser,
         target_username: str,
-        start: datetime,
+        start: float,
+        now: datetime,
         after_time: datetime,
         before_time: Optional[datetime],
         time_str: str,
@@ -725,7 +728,7 @@ class History(Cog):
         """Determine how long it will take the user to catch up with the target user."""
         # Try to find the target user
         try:
-            target = get_user(target_username, ctx, self.blossom_api)
+            target = await get_user(target_username, ctx, self.blossom_api)
         except UserNotFound:
             # This doesn't mean the username is wrong
             # They could have also mistyped a rank
@@ -749,7 +752,7 @@ class History(Cog):
             target, after_time, before_time, blossom_api=self.blossom_api
         )
 
-        time_frame = (before_time or start) - after_time
+        time_frame = (before_time or now) - after_time
 
         if user_progress <= target_progress:
             description = i18n["until"]["embed_description_user_never"].format(
@@ -767,7 +770,7 @@ class History(Cog):
                 (user_progress - target_progress) / time_frame.total_seconds()
             )
             relative_time = timedelta(seconds=seconds_needed)
-            absolute_time = start + relative_time
+            absolute_time = now + relative_time
 
             intersection_gamma = user["gamma"] + math.ceil(
                 (user_progress / time_frame.total_seconds())
@@ -844,7 +847,8 @@ class History(Cog):
         before: Optional[str] = None,
     ) -> None:
         """Determine how long it will take the user to reach the given goal."""
-        start = datetime.now(tz=pytz.utc)
+        start = time.perf_counter()
+        now = datetime.now(tz=timezone.utc)
 
         after_time, before_time, time_str = parse_time_constraints(after, before)
 
@@ -860,7 +864,7 @@ class History(Cog):
             )
         )
 
-        user = get_user(username, ctx, self.blossom_api)
+        user = await get_user(username, ctx, self.blossom_api)
 
         if goal is not None:
             try:
@@ -874,7 +878,7 @@ class History(Cog):
 
                 # Try to treat the goal as a user
                 return await self._until_user_catch_up(
-                    ctx, msg, user, goal, start, after_time, before_time, time_str,
+                    ctx, msg, user, goal, start, now, after_time, before_time, time_str,
                 )
         elif user:
             # Take the next rank for the user
@@ -902,7 +906,7 @@ class History(Cog):
             user_gamma,
             goal_gamma,
             goal_str,
-            start,
+            now,
             after_time,
             before_time,
             blossom_api=self.blossom_api,
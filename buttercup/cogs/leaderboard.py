@@ -1,7 +1,7 @@
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
-import pytz
 from blossom_wrapper import BlossomAPI
 from discord import Colour, Embed
 from discord.ext.commands import Cog
@@ -43,8 +43,8 @@ def format_leaderboard_timeframe(
         return "all time"
 
     # 2017-04-01 is the start of the project
-    delta = (before or datetime.now(tz=pytz.utc)) - (
-        after or datetime(2017, 4, 1, tzinfo=pytz.utc)
+    delta = (before or datetime.now(tz=timezone.utc)) - (
+        after or datetime(2017, 4, 1, tzinfo=timezone.utc)
     )
 
     return get_timedelta_str(delta)
@@ -89,7 +89,7 @@ class Leaderboard(Cog):
         before: Optional[str] = None,
     ) -> None:
         """Get the leaderboard for the given user."""
-        start = datetime.now(tz=pytz.utc)
+        start = time.perf_counter()
 
         after_time, before_time, time_str = parse_time_constraints(after, before)
 
@@ -101,7 +101,7 @@ class Leaderboard(Cog):
             )
         )
 
-        user = get_user(username, ctx, self.blossom_api)
+        user = await get_user(username, ctx, self.blossom_api)
 
         top_count = 5 if user else 15
         context_count = 5
@@ -1,11 +1,10 @@
 import asyncio
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Dict
 
 import dateutil.parser
 import pandas as pd
-import pytz
 from blossom_wrapper import BlossomAPI
 from discord import DiscordException, Embed
 from discord.ext import tasks
@@ -198,7 +197,7 @@ class Queue(Cog):
     async def update_unclaimed_submissions(self) -> None:
         """Update the submissions that are currently unclaimed in the queue."""
         # Posts older than 18 hours are archived
-        queue_start = datetime.now(tz=pytz.utc) - timedelta(hours=18)
+        queue_start = datetime.now(tz=timezone.utc) - timedelta(hours=18)
         results = []
         size = 500
         page = 1
@@ -233,7 +232,7 @@ class Queue(Cog):
     async def update_claimed_submissions(self) -> None:
         """Update the submissions that are currently in progress."""
         # Only consider recent posts that may still be worked on
-        queue_start = datetime.now(tz=pytz.utc) - timedelta(hours=48)
+        queue_start = datetime.now(tz=timezone.utc) - timedelta(hours=48)
         results = []
         size = 500
         page = 1
@@ -1,4 +1,4 @@
-from datetime import datetime
+import time
 from typing import Callable, List, Optional
 from xmlrpc.client import Boolean
 
@@ -55,7 +55,7 @@ async def send_rules_message(
     msg: SlashMessage,
     rules: List[Rule],
     subreddit: str,
-    start_time: datetime,
+    start_time: float,
     localization_key: str,
 ) -> None:
     """Send an embed containing the rules to the user."""
@@ -90,7 +90,7 @@ class Rules(Cog):
         filter_function: Callable[[Rule], Boolean],
     ) -> None:
         """Send the rules filtered by the given function to the user."""
-        start = datetime.now()
+        start = time.perf_counter()
         sub_name = extract_sub_name(subreddit)
         # Send a quick response
         # We will edit this later with the actual content
@@ -191,7 +191,7 @@ class Rules(Cog):
         self, ctx: SlashContext, subreddit: Optional[str] = None
     ) -> None:
         """Get the list of all our partner subreddits."""
-        start = datetime.now()
+        start = time.perf_counter()
 
         if subreddit is None:
             msg = await ctx.send(i18n["partner"]["getting_partner_list"])
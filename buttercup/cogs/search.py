@@ -1,10 +1,10 @@
-import asyncio
-import math
 import re
-from datetime import datetime
-from typing import Any, Dict, List, Optional, TypedDict
+import string
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple, TypedDict
 
-import pytz
 from blossom_wrapper import BlossomAPI
 from dateutil import parser
 from discord import Embed, Forbidden, Reaction, User
@@ -18,6 +18,7 @@ from buttercup.bot import ButtercupBot
 from buttercup.cogs.helpers import (
     BlossomException,
     BlossomUser,
+    TimedCache,
     get_discord_time_str,
     get_duration_str,
     get_initial_username,
@@ -25,11 +26,16 @@ from buttercup.cogs.helpers import (
     get_user,
     get_username,
     parse_time_constraints,
+    run_in_executor,
 )
 from buttercup.strings import translation
 
 i18n = translation()
 
+# The templates for each search result, looked up once instead of for every result
+result_item_template = i18n["search"]["description"]["item"]
+more_occurrences_template = i18n["search"]["description"]["more_occurrences"]
+
 
 # Unicode characters for control emojis
 first_page_emoji = "\u23EE\uFE0F"  # Previous track button
@@ -38,6 +44,11 @@ next_page_emoji = "\u25B6\uFE0F"  # Right triangle button
 last_page_emoji = "\u23ED\uFE0F"  # Next track button
 
 
+# Translation table to lowercase ASCII bytes
+ascii_lowercase_table = bytes.maketrans(
+    string.ascii_uppercase.encode(), string.ascii_lowercase.encode()
+)
+
 header_regex = re.compile(
     r"^\s*\*(?P<format>\w+)\s*Transcription:?(?:\s*(?P<type>[\w ]+))?\*", re.IGNORECASE
 )
@@ -46,9 +57,14 @@ header_regex = re.compile(
 def get_transcription_type(transcription: Dict[str, Any]) -> str:
     """Try to determine the type of the transcription."""
     text: str = transcription["text"]
-    header = text.split("---")[0]
-
-    match = header_regex.search(header)
+    # The header is in front of the first separator.
+    # Headers are short, so we don't need to look at the rest of the text.
+    max_header_length = 512
+    header_end = text.find("---", 0, max_header_length)
+    if header_end < 0:
+        header_end = max_header_length
+
+    match = header_regex.match(text, 0, header_end)
     if match is None:
         return "Post"
 
@@ -75,8 +91,8 @@ def format_query_occurrence(line: str, line_num: int, pos: int, query: str) -> s
     left_context = line[:pos]
     right_context = line[pos + len(query) :]
 
-    left_chars = math.ceil(remaining_chars / 2)
-    right_chars = math.floor(remaining_chars / 2)
+    left_chars = -(-remaining_chars // 2)
+    right_chars = remaining_chars // 2
 
     # Give each side as much context as possible
     if len(left_context) < left_chars:
@@ -103,53 +119,102 @@ def format_query_occurrence(line: str, line_num: int, pos: int, query: str) -> s
     return context + underline
 
 
+def find_query_occurrences(
+    text: str, query: str, max_occurrences: int
+) -> Tuple[List[int], int]:
+    """Find the occurrences of the query in the text, ignoring the case.
+
+    :returns: The positions of the first occurrences (at most max_occurrences)
+        and the total number of occurrences.
+    """
+    if text.isascii() and query.isascii():
+        # For ASCII text (the usual case) searching the lowercased bytes
+        # is a lot faster than a case-insensitive regex
+        text_lower = text.encode("ascii").translate(ascii_lowercase_table)
+        query_lower = query.encode("ascii").translate(ascii_lowercase_table)
+        positions = []
+        pos = text_lower.find(query_lower)
+        while pos >= 0 and len(positions) < max_occurrences:
+            positions.append(pos)
+            pos = text_lower.find(query_lower, pos + len(query_lower))
+        return positions, text_lower.count(query_lower)
+
+    query_regex = re.compile(re.escape(query), re.IGNORECASE)
+    positions = [
+        match.start() for match in islice(query_regex.finditer(text), max_occurrences)
+    ]
+    return positions, len(query_regex.findall(text))
+
+
 def create_result_description(result: Dict[str, Any], num: int, query: str) -> str:
     """Crate a description for the given result."""
     transcription: str = result["text"]
-    total_occurrences = transcription.casefold().count(query.casefold())
     # Determine meta info about the post/transcription
-    tr_type = get_transcription_type(result)
-    tr_source = get_transcription_source(result)
+    # The results are cached, so it's stored on them when they are shown again
+    tr_type = result.get("_tr_type")
+    if tr_type is None:
+        tr_type = result["_tr_type"] = get_transcription_type(result)
+    tr_source = result.get("_tr_source")
+    if tr_source is None:
+        tr_source = result["_tr_source"] = get_transcription_source(result)
     time = parser.parse(result["create_time"])
-    description = (
-        i18n["search"]["description"]["item"].format(
+    description = [
+        result_item_template.format(
             num=num,
             tr_type=tr_type,
             tr_source=tr_source,
             url=result["url"],
             timestamp=get_discord_time_str(time, "R"),
-        )
+        ),
         # Start code block for occurrences
-        + "\n```\n"
-    )
+        "\n```\n",
+    ]
 
     # The maximum number of occurrences to show
     max_occurrences = 4
+    positions, total_occurrences = find_query_occurrences(
+        transcription, query, max_occurrences
+    )
     cur_count = 0
+    # The line of the last occurrence
+    line_num = 1
+    line_start = 0
+
+    for pos in positions:
+        # Determine the line where the word occurs
+        line_num += transcription.count("\n", line_start, pos)
+        line_start = transcription.rfind("\n", 0, pos) + 1
+        line_end = transcription.find("\n", pos + len(query))
+        if line_end < 0:
+            line_end = len(transcription)
+        line = transcription[line_start:line_end]
+        # Add the line where the word occurs
+        description.append(
+            format_query_occurrence(line, line_num, pos - line_start, query)
+        )
+        cur_count += 1
 
-    for i, line in enumerate(transcription.splitlines()):
-        start = 0
-        pos = line.casefold().find(query.casefold())
-        while pos >= 0 and cur_count < max_occurrences:
-            # Add the line where the word occurs
-            description += format_query_occurrence(line, i + 1, pos, query)
-            # Move to the next occurrence in the line
-            cur_count += 1
-            start = pos + len(query)
-            pos = line.casefold().find(query.casefold(), start)
-
-        if cur_count >= max_occurrences:
-            break
-
-    description += "```\n"
+    description.append("```\n")
     if cur_count < total_occurrences:
-        description += (
-            i18n["search"]["description"]["more_occurrences"].format(
-                count=total_occurrences - cur_count
-            )
-            + "\n\n"
+        description.append(
+            more_occurrences_template.format(count=total_occurrences - cur_count)
         )
-    return description
+        description.append("\n\n")
+    return "".join(description)
+
+
+def create_page_description(
+    results: List[Dict[str, Any]], offset: int, query: str
+) -> str:
+    """Create the description for a page of results.
+
+    :param results: The results to display on the page.
+    :param offset: The number of results on the previous pages.
+    """
+    return "".join(
+        create_result_description(result, offset + i + 1, query)
+        for i, result in enumerate(results)
+    )
 
 
 async def clear_reactions(msg: SlashMessage) -> None:
@@ -170,71 +235,57 @@ class SearchCacheItem(TypedDict):
     query: str
     # The user that the search is restricted to
     user: Optional[BlossomUser]
-    # The time restriction for the search
-    after_time: Optional[datetime]
-    before_time: Optional[datetime]
+    # The time restriction for the search, as ISO strings for the requests
+    from_str: Optional[str]
+    until_str: Optional[str]
     time_str: str
     # The current Discord page for the query
     cur_page: int
     # The id of the user who executed the query
-    discord_user_id: str
+    discord_user_id: int
     # The cached response data from previous requests
     response_data: Optional[Dict[str, Any]]
     # The page of the cached response data
     request_page: int
-
-
-class SearchCacheEntry(TypedDict):
-    last_modified: datetime
-    element: SearchCacheItem
+    # The number of Discord pages for the cached response data
+    total_discord_pages: int
 
 
 class SearchCache:
     def __init__(self, capacity: int) -> None:
         """Initialize a new cache."""
         self.capacity = capacity
-        self.cache = {}
+        # The entries are ordered from least to most recently used
+        self.cache = OrderedDict()
 
     def _clean(self) -> None:
         """Ensure that the cache capacity isn't exceeded."""
         if len(self.cache) > self.capacity:
-            # Delete the oldest entry
-            sorted_entries = sorted(
-                self.cache.items(), key=lambda x: x[1]["last_modified"]
-            )
-            self.cache.pop(sorted_entries[0][0])
+            # Delete the least recently used entry
+            self.cache.popitem(last=False)
 
-    def set(
-        self,
-        msg_id: str,
-        entry: SearchCacheItem,
-        time: datetime = datetime.now(tz=pytz.utc),
-    ) -> None:
+    def set(self, msg_id: int, entry: SearchCacheItem) -> None:
         """Set an entry of the cache.
 
         :param msg_id: The ID of the message where the search results are displayed.
         :param entry: The cache item for the corresponding message.
-        :param time: The time when the message was last interacted with.
-            This should only be set directly in tests, keep it as the default value.
         """
-        self.cache[msg_id] = {
-            "last_modified": time,
-            "element": entry,
-        }
+        self.cache[msg_id] = entry
+        self.cache.move_to_end(msg_id)
         # Make sure the capacity is not exceeded
         self._clean()
 
-    def get(self, msg_id: str) -> Optional[SearchCacheItem]:
+    def get(self, msg_id: int) -> Optional[SearchCacheItem]:
         """Get the cache entry for the corresponding message.
 
         Note that this might return no message, even if it has been added at some point.
-        When the capacity of the cache is exceeded, old items get deleted.
+        When the capacity of the cache is exceeded, the least recently used
+        items get deleted.
         """
         item = self.cache.get(msg_id)
         if item is not None:
-            return item["element"]
-        else:
-            return None
+            self.cache.move_to_end(msg_id)
+        return item
 
 
 class Search(Cog):
@@ -243,15 +294,51 @@ class Search(Cog):
         self.bot = bot
         self.blossom_api = blossom_api
         self.cache = SearchCache(10)
+        # Repeated searches for the same results reuse the Blossom response
+        self.response_cache = TimedCache(capacity=64, ttl=60)
         # Size of a search result page on Discord
         self.discord_page_size = 5
         # Size of the fetched result pages from Blossom
         self.request_page_size = self.discord_page_size * 5
 
+    async def _get_results(
+        self,
+        query: str,
+        user_id: Optional[int],
+        from_str: Optional[str],
+        until_str: Optional[str],
+        request_page: int,
+    ) -> Dict[str, Any]:
+        """Get a page of search results from Blossom."""
+        # The search is case-insensitive
+        cache_key = (query.lower(), user_id, from_str, until_str, request_page)
+        response_data = self.response_cache.get(cache_key)
+        if response_data is not None:
+            return response_data
+
+        data = {
+            "text__icontains": query,
+            "author": user_id,
+            "create_time__gte": from_str,
+            "create_time__lte": until_str,
+            "url__isnull": False,
+            "ordering": "-create_time",
+            "page_size": self.request_page_size,
+            "page": request_page + 1,
+        }
+        response = await run_in_executor(
+            self.blossom_api.get, path="transcription", params=data
+        )
+        if response.status_code != 200:
+            raise BlossomException(response)
+        response_data = response.json()
+        self.response_cache.set(cache_key, response_data)
+        return response_data
+
     async def _search_from_cache(
         self,
         msg: SlashMessage,
-        start: datetime,
+        start: float,
         cache_item: SearchCacheItem,
         page_mod: int,
     ) -> None:
@@ -263,36 +350,25 @@ class Search(Cog):
         query = cache_item["query"]
         user = cache_item["user"]
         user_id = user["id"] if user else None
-        after_time = cache_item["after_time"]
-        before_time = cache_item["before_time"]
+        from_str = cache_item["from_str"]
+        until_str = cache_item["until_str"]
         time_str = cache_item["time_str"]
 
-        from_str = after_time.isoformat() if after_time else None
-        until_str = before_time.isoformat() if before_time else None
-
         request_page = (discord_page * self.discord_page_size) // self.request_page_size
 
         if (
             not cache_item["response_data"]
             or request_page != cache_item["request_page"]
         ):
-            # A new request has to be made
-            data = {
-                "text__icontains": cache_item["query"],
-                "author": user_id,
-                "create_time__gte": from_str,
-                "create_time__lte": until_str,
-                "url__isnull": False,
-                "ordering": "-create_time",
-                "page_size": self.request_page_size,
-                "page": request_page + 1,
-            }
-            response = self.blossom_api.get(path="transcription", params=data)
-            if response.status_code != 200:
-                raise BlossomException(response)
-            response_data = response.json()
+            # A new page of results is needed
+            response_data = await self._get_results(
+                query, user_id, from_str, until_str, request_page
+            )
+            # Integer division rounding up
+            total_discord_pages = -(-response_data["count"] // self.discord_page_size)
         else:
             response_data = cache_item["response_data"]
+            total_discord_pages = cache_item["total_discord_pages"]
 
         if response_data["count"] == 0:
             await msg.edit(
@@ -305,21 +381,25 @@ class Search(Cog):
             )
             return
 
+        if response_data is cache_item["response_data"]:
+            # The results are already cached, only the page has changed
+            cache_item["cur_page"] = discord_page
         # Only cache the result if the user can change pages
-        if response_data["count"] > self.discord_page_size:
+        elif response_data["count"] > self.discord_page_size:
             # Update the cache
             self.cache.set(
                 msg.id,
                 {
                     "query": query,
                     "user": cache_item["user"],
-                    "after_time": after_time,
-                    "before_time": before_time,
+                    "from_str": from_str,
+                    "until_str": until_str,
                     "time_str": time_str,
                     "cur_page": discord_page,
                     "discord_user_id": cache_item["discord_user_id"],
                     "response_data": response_data,
                     "request_page": request_page,
+                    "total_discord_pages": total_discord_pages,
                 },
             )
 
@@ -331,12 +411,10 @@ class Search(Cog):
         page_results: List[Dict[str, Any]] = response_data["results"][
             result_offset : result_offset + self.discord_page_size
         ]
-        description = ""
-
-        for i, res in enumerate(page_results):
-            description += create_result_description(res, discord_offset + i + 1, query)
-
-        total_discord_pages = math.ceil(response_data["count"] / self.discord_page_size)
+        # Building the descriptions can take a while for long transcriptions
+        description = await run_in_executor(
+            create_page_description, page_results, discord_offset, query
+        )
 
         await msg.edit(
             content=i18n["search"]["embed_message"].format(
@@ -370,7 +448,9 @@ class Search(Cog):
             emoji_controls.append(last_page_emoji)
 
         # Add control emojis to message
-        await asyncio.gather(*[msg.add_reaction(emoji) for emoji in emoji_controls])
+        # One at a time, so that they are displayed in the right order
+        for emoji in emoji_controls:
+            await msg.add_reaction(emoji)
 
     @cog_ext.cog_slash(
         name="search",
@@ -412,7 +492,7 @@ class Search(Cog):
         before: Optional[str] = None,
     ) -> None:
         """Search for transcriptions containing the given text."""
-        start = datetime.now()
+        start = time.perf_counter()
         after_time, before_time, time_str = parse_time_constraints(after, before)
 
         # Send a first message to show that the bot is responsive.
@@ -423,19 +503,20 @@ class Search(Cog):
             )
         )
 
-        user = get_user(username, ctx, self.blossom_api)
+        user = await get_user(username, ctx, self.blossom_api)
 
         # Simulate an initial cache item
         cache_item: SearchCacheItem = {
             "query": query,
             "user": user,
-            "after_time": after_time,
-            "before_time": before_time,
+            "from_str": after_time.isoformat() if after_time else None,
+            "until_str": before_time.isoformat() if before_time else None,
             "time_str": time_str,
             "cur_page": 0,
             "discord_user_id": ctx.author_id,
             "response_data": None,
             "request_page": 0,
+            "total_discord_pages": 0,
         }
 
         # Display the first page
@@ -444,7 +525,7 @@ class Search(Cog):
     @commands.Cog.listener()
     async def on_reaction_add(self, reaction: Reaction, user: User) -> None:
         """Process reactions to go through the result pages."""
-        start = datetime.now()
+        start = time.perf_counter()
         msg: SlashMessage = reaction.message
         cache_item = self.cache.get(msg.id)
         if cache_item is None:
@@ -457,10 +538,7 @@ class Search(Cog):
         discord_page = cache_item["cur_page"]
         emoji = reaction.emoji
 
-        if response_data := cache_item["response_data"]:
-            last_page = math.ceil(response_data["count"] / self.discord_page_size) - 1
-        else:
-            last_page = 0
+        last_page = max(cache_item["total_discord_pages"] - 1, 0)
 
         # Determine which action should be executed
         if emoji == first_page_emoji and discord_page > 0:
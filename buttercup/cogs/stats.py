@@ -1,9 +1,9 @@
-from datetime import datetime
+import time
+from datetime import datetime, timezone
 from random import choice
 from typing import Optional
 
 import discord
-import pytz
 from blossom_wrapper import BlossomAPI
 from dateutil.parser import parse
 from discord import Embed
@@ -84,7 +84,7 @@ class Stats(Cog):
 
     async def _all_stats(self, msg: SlashMessage) -> None:
         """Get stats about all users."""
-        start = datetime.now(tz=pytz.utc)
+        start = time.perf_counter()
 
         response = self.blossom_api.get("summary/")
 
@@ -113,9 +113,9 @@ class Stats(Cog):
         self, ctx: SlashContext, msg: SlashMessage, username: str
     ) -> None:
         """Get stats about a single user."""
-        start = datetime.now(tz=pytz.utc)
+        start = time.perf_counter()
 
-        user = get_user(username, ctx, self.blossom_api)
+        user = await get_user(username, ctx, self.blossom_api)
 
         # Get the date of last activity
         submission_response = self.blossom_api.get(
@@ -214,7 +214,7 @@ class Stats(Cog):
         before: Optional[str] = None,
     ) -> None:
         """Get the transcribing progress of a user in the given time frame."""
-        start = datetime.now()
+        start = time.perf_counter()
 
         # Parse time frame. Defaults to 24 hours ago
         after_time, before_time, time_str = parse_time_constraints(
@@ -229,7 +229,7 @@ class Stats(Cog):
             )
         )
 
-        user = get_user(username, ctx, self.blossom_api)
+        user = await get_user(username, ctx, self.blossom_api)
 
         from_str = after_time.isoformat() if after_time else None
         until_str = before_time.isoformat() if before_time else None
@@ -254,7 +254,7 @@ class Stats(Cog):
         is_24_hours = (
             after_time is not None
             and (
-                (before_time or datetime.now(tz=pytz.utc)) - after_time
+                (before_time or datetime.now(tz=timezone.utc)) - after_time
             ).total_seconds()
             # Up to 2 seconds difference are allowed
             <= 60 * 60 * 24 + 2
@@ -0,0 +1,23 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from buttercup.cogs.heatmap import Heatmap
+
+
+def test_heatmap_cache_relative_time() -> None:
+    """Verify that repeated heatmaps with a relative time are cached."""
+    cog = Heatmap(bot=MagicMock(), blossom_api=MagicMock())
+    ctx = MagicMock()
+    ctx.author.display_name = "u/test"
+    ctx.send = AsyncMock(return_value=MagicMock(edit=AsyncMock()))
+    user = {"id": 1, "username": "test"}
+
+    with patch(
+        "buttercup.cogs.heatmap.get_user", AsyncMock(return_value=user)
+    ), patch.object(
+        cog, "_create_heatmap_image", AsyncMock(return_value=b"heatmap")
+    ) as create_heatmap_image:
+        for _ in range(2):
+            asyncio.run(cog._heatmap.func(cog, ctx, "me", after="1 week"))
+
+    assert create_heatmap_image.await_count == 1
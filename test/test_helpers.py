@@ -1,11 +1,13 @@
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 
-import pytz
-from pytest import mark
+from pytest import mark, raises
 
 from buttercup.cogs.helpers import (
     BlossomUser,
+    NoUsernameException,
+    TimedCache,
     escape_formatting,
     extract_sub_name,
     extract_username,
@@ -13,7 +15,9 @@ from buttercup.cogs.helpers import (
     format_absolute_datetime,
     format_relative_datetime,
     get_progress_bar,
+    get_rank,
     get_transcription_source,
+    get_unit_key,
     get_username,
     join_items_with_and,
     parse_time_constraints,
@@ -55,6 +59,10 @@ def test_username_regex(
         ("/u/user_name", "user_name"),
         ("/u/user12345", "user12345"),
         ("/u/user-name_12345 UTC-5", "user-name_12345"),
+        ("user [mod]", "user"),
+        ("/user", "/user"),
+        ("u/", "u/"),
+        ("/u/ UTC+2", "/u/"),
     ],
 )
 def test_extract_username(user_input: str, expected: str) -> None:
@@ -63,6 +71,13 @@ def test_extract_username(user_input: str, expected: str) -> None:
     assert actual == expected
 
 
+@mark.parametrize("user_input", ["", " user"])
+def test_extract_username_missing(user_input: str) -> None:
+    """Test that an exception is raised if there is no user name."""
+    with raises(NoUsernameException):
+        extract_username(user_input)
+
+
 @mark.parametrize(
     "sub_input,expected",
     [
@@ -179,6 +194,27 @@ def test_get_progress_bar(
     assert actual == expected
 
 
+@mark.parametrize(
+    "gamma,expected",
+    [
+        (-1, "Visitor"),
+        (0, "Visitor"),
+        (1, "Initiate"),
+        (24, "Initiate"),
+        (25, "Pink"),
+        (999, "Gold"),
+        (1000, "Diamond"),
+        (19_999, "Jade"),
+        (20_000, "Sapphire"),
+        (123_456, "Sapphire"),
+    ],
+)
+def test_get_rank(gamma: int, expected: str) -> None:
+    """Test that the rank is determined correctly from the gamma."""
+    actual = get_rank(gamma)
+    assert actual["name"] == expected
+
+
 @mark.parametrize(
     "items,expected",
     [
@@ -231,23 +267,47 @@ def test_format_relative_datetime(amount: float, unit_key: str, expected: str) -
     assert actual == expected
 
 
+@mark.parametrize(
+    "unit,expected",
+    [
+        ("", "hours"),
+        ("h", "hours"),
+        ("hour", "hours"),
+        ("s", "seconds"),
+        ("secs", "seconds"),
+        ("min", "minutes"),
+        ("mins", "minutes"),
+        ("m", "months"),
+        ("days", "days"),
+        ("w", "weeks"),
+        ("years", "years"),
+        ("hrs", None),
+        ("lightyears", None),
+    ],
+)
+def test_get_unit_key(unit: str, expected: Optional[str]) -> None:
+    """Test that time units are determined correctly."""
+    actual = get_unit_key(unit)
+    assert actual == expected
+
+
 @mark.parametrize(
     "input_str,expected_datetime,expected_str",
     [
         (
             "2020-03-04 10:13",
-            datetime(2020, 3, 4, 10, 13, tzinfo=pytz.utc),
+            datetime(2020, 3, 4, 10, 13, tzinfo=timezone.utc),
             "2020-03-04 10:13",
         ),
         (
             "2020-03-04T10:13",
-            datetime(2020, 3, 4, 10, 13, tzinfo=pytz.utc),
+            datetime(2020, 3, 4, 10, 13, tzinfo=timezone.utc),
             "2020-03-04 10:13",
         ),
-        ("2020-03-04", datetime(2020, 3, 4, tzinfo=pytz.utc), "2020-03-04"),
+        ("2020-03-04", datetime(2020, 3, 4, tzinfo=timezone.utc), "2020-03-04"),
         (
             "10:13",
-            datetime(now.year, now.month, now.day, 10, 13, tzinfo=pytz.utc),
+            datetime(now.year, now.month, now.day, 10, 13, tzinfo=timezone.utc),
             "10:13",
         ),
     ],
@@ -277,10 +337,10 @@ def test_parse_relative_datetime(
     input_str: str, expected_timedelta: timedelta, expected_str: str
 ) -> None:
     """Test that absolute date times are formatted correctly."""
-    start = datetime.now(tz=pytz.utc)
+    start = datetime.now(tz=timezone.utc)
     expected_datetime = start - expected_timedelta
     actual_datetime, actual_str = try_parse_time(input_str)
-    duration = datetime.now(tz=pytz.utc) - start
+    duration = datetime.now(tz=timezone.utc) - start
     epsilon = abs(actual_datetime - expected_datetime)
     # We can't check for equality because the result depends on the current time
     # Instead we assert that the difference is small enough, considering execution time
@@ -297,15 +357,15 @@ def test_parse_relative_datetime(
         (
             "2020-01-08",
             None,
-            datetime(2020, 1, 8, tzinfo=pytz.utc),
+            datetime(2020, 1, 8, tzinfo=timezone.utc),
             None,
             "from 2020-01-08 until now",
         ),
         (
             "2020-01-08",
             "2021-09-13T13:20",
-            datetime(2020, 1, 8, tzinfo=pytz.utc),
-            datetime(2021, 9, 13, 13, 20, tzinfo=pytz.utc),
+            datetime(2020, 1, 8, tzinfo=timezone.utc),
+            datetime(2021, 9, 13, 13, 20, tzinfo=timezone.utc),
             "from 2020-01-08 until 2021-09-13 13:20",
         ),
     ],
@@ -356,7 +416,7 @@ def test_parse_relative_time_constraints(
     expected_str: Optional[datetime],
 ) -> None:
     """Test that relative time constraints are parsed correctly."""
-    start = datetime.now(tz=pytz.utc)
+    start = datetime.now(tz=timezone.utc)
     expected_after = (
         start - expected_after_delta if expected_after_delta is not None else None
     )
@@ -366,7 +426,7 @@ def test_parse_relative_time_constraints(
     actual_after, actual_before, actual_str = parse_time_constraints(
         after_str, before_str
     )
-    duration = datetime.now(tz=pytz.utc) - start
+    duration = datetime.now(tz=timezone.utc) - start
 
     # We can't check for equality because the result depends on the current time
     # Instead we assert that the difference is small enough, considering execution time
@@ -396,9 +456,43 @@ def test_parse_relative_time_constraints(
             "https://reddit.com/r/CasualUK/comments/qzhsco/found_this_bag_of_mints_on_the_floor_which_is/hlmjpoa/",  # noqa: E501
             "r/CasualUK",
         ),
+        ("https://www.reddit.com/r/test/comments/abc/", "r/test"),
+        ("https://example.com/abc/", "r/?"),
     ],
 )
 def test_get_transcription_source(url: str, expected: str) -> None:
     """Verify that the transcription source is determined correctly."""
     tr_type = get_transcription_source({"url": url})
     assert tr_type == expected
+
+
+class TestTimedCache:
+    def test_timed_cache_get(self) -> None:
+        """Verify that cached values can be retrieved."""
+        cache = TimedCache(2, 60)
+        cache.set(("user", 1), b"abc")
+
+        assert cache.get(("user", 1)) == b"abc"
+        assert cache.get(("user", 2)) is None
+
+    def test_timed_cache_clean(self) -> None:
+        """Verify that the least recently used entry is deleted."""
+        cache = TimedCache(2, 60)
+        cache.set("abc", 1)
+        cache.set("def", 2)
+        # Mark the first entry as recently used
+        cache.get("abc")
+        cache.set("ghi", 3)
+
+        assert cache.get("abc") == 1
+        assert cache.get("def") is None
+        assert cache.get("ghi") == 3
+
+    def test_timed_cache_expire(self) -> None:
+        """Verify that entries expire after the given time."""
+        cache = TimedCache(2, 60)
+        cache.set("abc", 1, time.monotonic() - 61)
+        cache.set("def", 2, time.monotonic() - 59)
+
+        assert cache.get("abc") is None
+        assert cache.get("def") == 2
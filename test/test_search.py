@@ -1,9 +1,10 @@
-from datetime import datetime
+from typing import List, Tuple
 
 from pytest import mark
 
 from buttercup.cogs.search import (
     SearchCache,
+    find_query_occurrences,
     get_transcription_type,
 )
 
@@ -44,6 +45,24 @@ def test_get_transcription_type(transcription: str, expected: str) -> None:
     assert tr_type == expected
 
 
+@mark.parametrize(
+    "text,query,expected",
+    [
+        ("Foo bar foo", "foo", ([0, 8], 2)),
+        ("Foo bar foo", "FOO", ([0, 8], 2)),
+        ("Foo bar foo", "baz", ([], 0)),
+        ("aaaaaaaa", "aa", ([0, 2], 4)),
+        ("Fööbar föö", "FÖÖ", ([0, 7], 2)),
+        ("Fööbar foo", "foo", ([7], 1)),
+    ],
+)
+def test_find_query_occurrences(
+    text: str, query: str, expected: Tuple[List[int], int]
+) -> None:
+    """Verify that the occurrences of the query are found correctly."""
+    assert find_query_occurrences(text, query, 2) == expected
+
+
 class TestSearchCache:
     def test_search_cache_clean(self) -> None:
         """Verify that the cache is cleaned when the capacity is exceeded."""
@@ -57,7 +76,6 @@ class TestSearchCache:
                 "request_page": 0,
                 "discord_user_id": "user",
             },
-            datetime(2021, 1, 3),
         )
         cache.set(
             "def",
@@ -68,8 +86,39 @@ class TestSearchCache:
                 "request_page": 0,
                 "discord_user_id": "user",
             },
-            datetime(2021, 1, 4),
         )
 
         assert cache.get("abc") is None
         assert cache.get("def")["query"] == "ddd"
+
+    def test_search_cache_get(self) -> None:
+        """Verify that getting an entry protects it from being cleaned."""
+        cache = SearchCache(2)
+        for msg_id in ["abc", "def"]:
+            cache.set(
+                msg_id,
+                {
+                    "query": msg_id,
+                    "cur_page": 0,
+                    "response_data": None,
+                    "request_page": 0,
+                    "discord_user_id": "user",
+                },
+            )
+
+        assert cache.get("abc")["query"] == "abc"
+
+        cache.set(
+            "ghi",
+            {
+                "query": "ghi",
+                "cur_page": 0,
+                "response_data": None,
+                "request_page": 0,
+                "discord_user_id": "user",
+            },
+        )
+
+        assert cache.get("abc")["query"] == "abc"
+        assert cache.get("def") is None
+        assert cache.get("ghi")["query"] == "ghi"